@@ -2,15 +2,30 @@
 """
 process_1gz.py
 
-Filter ONE gVCF/VCF .gz by:
+Filter ONE gVCF/VCF .gz (or several, in parallel) by:
   - heterozygous phased GT: 0|1 or 1|0
   - DP > 20
   - GQ >= 30
 
-Keeps all header lines.
+Keeps all header lines. Output is written as BGZF (blocked gzip) whenever
+bgzip or pysam is available, and is then tabix-indexed (.tbi) so downstream
+tools can read it in parallel / by region. Otherwise it is plain gzip and a
+[WARN] line notes that no index was written.
 
 Usage:
-  ./process_1gz.py IN_GZ OUT_GZ
+  ./process_1gz.py [--parquet] [--no-vcf] IN_GZ OUT_GZ [IN_GZ OUT_GZ ...]
+  ./process_1gz.py [--parquet] [--no-vcf] --pairs PAIRS_TSV
+
+Each IN_GZ/OUT_GZ pair is an independent job; with more than one pair the
+jobs run in a process pool (one worker per core, up to the number of pairs).
+
+  --pairs    read the pairs from a file, one "IN_GZ<TAB>OUT_GZ" per line
+             (no command-line length limit for large cohorts)
+
+  --parquet  also write the passing records' CHROM, POS, REF, ALT, GT, DP, GQ
+             as a Parquet sidecar next to OUT_GZ (OUT_GZ minus .vcf.gz,
+             plus .parquet); requires pyarrow
+  --no-vcf   with --parquet, skip writing the filtered VCF itself
 
 Example:
   ./process_1gz.py ../input/Cohort_A/001.g.vcf.gz \
@@ -18,9 +33,60 @@ Example:
 """
 
 import gzip
+import os
+import re
+import shutil
+import subprocess
 import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
 
+try:
+    import rapidgzip
+except ImportError:  # optional: fall back to the stdlib reader
+    rapidgzip = None
+
+try:
+    import pgzip
+except ImportError:  # optional: fall back to the stdlib writer
+    pgzip = None
+
+try:
+    import pysam
+except ImportError:  # optional: BGZF writing / tabix indexing
+    pysam = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as papq
+except ImportError:  # optional: only needed for the --parquet sidecar
+    pa = papq = None
+
+# zlib level 6 is about half the CPU of the default 9, with near-identical
+# output size on VCF text
+COMPRESS_LEVEL = 6
+THREADS = os.cpu_count() or 1
+CHUNK_SIZE = 1 << 22  # decompressed bytes per read in filter_and_count
+
+# native (de)compressors, used when found on PATH
+PIGZ = shutil.which("pigz")
+BGZIP = shutil.which("bgzip")
+TABIX = shutil.which("tabix")
+
+# Parquet sidecar: passing records as columns, written in batches
+PARQUET_BATCH = 65536
+SIDECAR_SCHEMA = pa.schema([
+    ("CHROM", pa.string()),
+    ("POS", pa.int32()),
+    ("REF", pa.string()),
+    ("ALT", pa.string()),
+    ("GT", pa.string()),
+    ("DP", pa.int32()),
+    ("GQ", pa.int32()),
+]) if pa is not None else None
+
 
 # ----------------------------
 # Criterion helpers
@@ -31,80 +97,265 @@ chr1    49272   .       G       A       148.77  PASS    .       GT:AD:DP:GQ
 chr1    732021  .       C       T       26.78   PASS    .       GT:AD:DP:GQ     0|1:15,3:18:55
 chr1    873542  .       G       A       659.77  PASS    .       GT:AD:DP:GQ     1|1:0,16:16:48
 """
-def is_heterozygous(gt):
-    """True for 0|1, 1|0"""
-    return gt in {"0|1", "1|0"}
+# Records are handled as bytes throughout, so these match bytes fields;
+# filter_and_count applies them inline in its record loop.
+_HET = frozenset((b"0|1", b"1|0"))                      # heterozygous GT
+_MISS = frozenset((None, b"", b".", b"./.", b".|."))    # missing GT
 
+# thresholds as regexes on the digit string: one C-level match, no int()
+_DP_GT20 = re.compile(rb"0*(?:2[1-9]|[3-9]\d|[1-9]\d{2,})")  # DP > 20
+_GQ_GE30 = re.compile(rb"0*(?:[3-9]\d|[1-9]\d{2,})")         # GQ >= 30
 
-def dp_passes(dp):
-    """True if DP is present and DP > 20"""
-    return dp is not None and dp.isdigit() and int(dp) > 20
 
+# ----------------------------
+# VCF helpers
+# ----------------------------
 
-def gq_passes(gq):
-    """True if GQ is present and GQ >= 30"""
-    return gq is not None and gq.isdigit() and int(gq) >= 30
+def make_gt_dp_gq_extractor():
+    """
+    Return extract(fmt, sample) -> (GT, DP, GQ) for FORMAT (col 9) and
+    sample column (col 10).
+
+    FORMAT is nearly always constant within a gVCF, so the GT/DP/GQ
+    positions are computed once per distinct FORMAT and reused. The usual
+    GATK FORMAT, GT:AD:DP:GQ, is sliced directly with three find() calls.
+    """
+    last_fmt = None
+    idx = (-1, -1, -1)
+    nsplit = 0
+
+    def extract_gt_dp_gq(fmt, sample):
+        nonlocal last_fmt, idx, nsplit
+        if fmt == b"GT:AD:DP:GQ":
+            a = sample.find(b":")
+            b = sample.find(b":", a + 1) if a >= 0 else -1
+            c = sample.find(b":", b + 1) if b >= 0 else -1
+            if c >= 0:
+                d = sample.find(b":", c + 1)
+                return sample[:a], sample[b + 1:c], sample[c + 1:] if d < 0 else sample[c + 1:d]
+            # fewer than four values: general path below
+
+        if fmt != last_fmt:
+            keys = fmt.split(b":")
+            idx = tuple(keys.index(k) if k in keys else -1 for k in (b"GT", b"DP", b"GQ"))
+            nsplit = max(idx) + 1
+            last_fmt = fmt
+        vals = sample.split(b":", nsplit)
+        n = len(vals)
+        i_gt, i_dp, i_gq = idx
+        return (vals[i_gt] if 0 <= i_gt < n else None,
+                vals[i_dp] if 0 <= i_dp < n else None,
+                vals[i_gq] if 0 <= i_gq < n else None)
+
+    return extract_gt_dp_gq
 
 
 # ----------------------------
-# VCF helpers
+# gz I/O helpers
 # ----------------------------
 
-def extract_gt_dp_gq(fmt, sample):
-    """Given FORMAT (col 9) and sample column (col 10), extract GT, DP, GQ."""
-    keys = fmt.split(":")
-    vals = sample.split(":")
-    m = dict(zip(keys, vals))
-    return m.get("GT"), m.get("DP"), m.get("GQ")
+@contextmanager
+def _read_pipe(cmd):
+    """Yield the binary stdout of a decompressor subprocess."""
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    try:
+        with proc.stdout as fin:
+            yield fin
+    finally:
+        rc = proc.wait()
+    if rc != 0:
+        raise OSError(f"{Path(cmd[0]).name} exited with status {rc}")
+
+
+@contextmanager
+def _write_pipe(cmd, path):
+    """Yield the binary stdin of a compressor subprocess writing to path."""
+    with open(path, "wb") as raw:
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=raw)
+    try:
+        with proc.stdin as fout:
+            yield fout
+    finally:
+        rc = proc.wait()
+    if rc != 0:
+        raise OSError(f"{Path(cmd[0]).name} exited with status {rc}")
+
+
+def open_gz_read(path, threads=THREADS):
+    """
+    Open a .gz for binary reading, in order of preference:
+      - rapidgzip (parallel DEFLATE across all cores)
+      - pigz subprocess (native inflate outside the GIL)
+      - stdlib gzip
+    """
+    if rapidgzip is not None:
+        return rapidgzip.open(str(path), parallelization=threads)
+    if PIGZ is not None:
+        return _read_pipe([PIGZ, "-dc", "-p", str(threads), str(path)])
+    return gzip.open(path, "rb")
+
+
+def open_gz_write(path, threads=THREADS):
+    """
+    Open a .gz for binary writing, in order of preference:
+      - bgzip subprocess (multithreaded, native; BGZF)
+      - pysam.BGZFile (BGZF)
+      - pgzip (multithreaded DEFLATE)
+      - stdlib gzip
+    Output is valid gzip in every case; only the first two are BGZF.
+    """
+    if BGZIP is not None:
+        return _write_pipe(
+            [BGZIP, "-@", str(threads), "-l", str(COMPRESS_LEVEL), "-c"], path)
+    if pysam is not None:
+        return pysam.BGZFile(str(path), "wb")
+    if pgzip is not None:
+        # blocksize scales with the thread budget: ~20 MB buffered per thread
+        return pgzip.open(path, "wb", thread=threads,
+                          blocksize=threads * 2 * 10**7, compresslevel=COMPRESS_LEVEL)
+    return gzip.open(path, "wb", compresslevel=COMPRESS_LEVEL)
+
+
+def is_bgzf(path):
+    """True if path starts with a BGZF block header (gzip + 'BC' extra field)."""
+    with open(path, "rb") as fh:
+        head = fh.read(16)
+    return (len(head) == 16 and head[:4] == b"\x1f\x8b\x08\x04"
+            and head[12:14] == b"BC")
+
+
+def tabix_index(path):
+    """
+    Write path + '.tbi' for a BGZF VCF with the VCF preset.
+    Returns False (no index written) when neither pysam nor tabix is available.
+    """
+    if pysam is not None:
+        pysam.tabix_index(str(path), preset="vcf", force=True, keep_original=True)
+        return True
+    if TABIX is not None:
+        subprocess.run([TABIX, "-f", "-p", "vcf", str(path)], check=True)
+        return True
+    return False
+
+
+def sidecar_path(out_gz):
+    """Parquet sidecar path for a filtered VCF path: X.vcf.gz -> X.parquet"""
+    name = out_gz.name.removesuffix(".gz").removesuffix(".bgz").removesuffix(".vcf")
+    return out_gz.with_name(name + ".parquet")
+
+
+def _sidecar_batch(rows):
+    """RecordBatch from (CHROM, POS, REF, ALT, GT, DP, GQ) bytes tuples."""
+    chrom, pos, ref, alt, gt, dp, gq = zip(*rows)
+    return pa.RecordBatch.from_arrays([
+        pa.array(chrom, pa.string()),
+        pa.array([int(x) for x in pos], pa.int32()),
+        pa.array(ref, pa.string()),
+        pa.array(alt, pa.string()),
+        pa.array(gt, pa.string()),
+        pa.array([int(x) for x in dp], pa.int32()),
+        pa.array([int(x) for x in gq], pa.int32()),
+    ], schema=SIDECAR_SCHEMA)
 
 
 # ----------------------------
 # Filter + progressive counting
 # ----------------------------
 
-def filter_and_count(in_gz, out_gz):
+def filter_and_count(in_gz, out_gz, threads=THREADS, out_parquet=None, write_vcf=True):
     """
     Writes a filtered gz VCF (keeps headers) with variants passing:
       - heterozygous GT
       - DP > 20
       - GQ >= 30
 
+    threads is the (de)compression thread budget for this file.
+    If out_parquet is given, the passing records are also written there as
+    a Parquet table (see SIDECAR_SCHEMA). write_vcf=False skips out_gz.
+
     Returns progressive counts.
     """
     n_records = gt_missing = after_gt = after_dp = after_gq = 0
+    extract_gt_dp_gq = make_gt_dp_gq_extractor()
     out_gz.parent.mkdir(parents=True, exist_ok=True)
 
-    with gzip.open(in_gz, "rt", encoding="utf-8", errors="replace") as fin, \
-         gzip.open(out_gz, "wt", encoding="utf-8") as fout:
-
-        for line in fin:
-            if line.startswith("#"):
-                fout.write(line)
-                continue
-
-            parts = line.rstrip("\n").split("\t")
-            if len(parts) < 10:
-                continue
-
-            n_records += 1
-            gt, dp, gq = extract_gt_dp_gq(parts[8], parts[9])
-
-            if gt in (None, ".", "./.", ".|."):
-                gt_missing += 1
-
-            if not is_heterozygous(gt):
-                continue
-            after_gt += 1
-
-            if not dp_passes(dp):
-                continue
-            after_dp += 1
-
-            if not gq_passes(gq):
-                continue
-            after_gq += 1
-
-            fout.write(line)
+    with ExitStack() as stack:
+        fin = stack.enter_context(open_gz_read(in_gz, threads))
+        fout = pq_writer = None
+        if write_vcf:
+            fout = stack.enter_context(open_gz_write(out_gz, threads))
+        if out_parquet is not None:
+            out_parquet.parent.mkdir(parents=True, exist_ok=True)
+            pq_writer = stack.enter_context(papq.ParquetWriter(
+                str(out_parquet), SIDECAR_SCHEMA, compression="zstd", use_dictionary=True))
+        rows = []  # passing records not yet written to pq_writer
+
+        # per-record lookups bound to locals: this loop runs once per variant
+        dp_ok = _DP_GT20.fullmatch
+        gq_ok = _GQ_GE30.fullmatch
+
+        # read large decompressed chunks and split lines in C; the last,
+        # possibly partial, line of each chunk is carried over to the next
+        tail = b""
+        while True:
+            data = fin.read(CHUNK_SIZE)
+            lines = (tail + data).split(b"\n")
+            tail = lines.pop() if data else b""
+            keep = []  # header + passing lines of this chunk, written in one call
+
+            for line in lines:
+                if line[:1] == b"#":
+                    keep.append(line)
+                    continue
+
+                # only FORMAT and the first sample are needed; don't split the rest
+                parts = line.split(b"\t", 10)
+                if len(parts) < 10:
+                    continue
+
+                n_records += 1
+                fmt, sample = parts[8], parts[9]
+
+                # GT first: most records are hom-ref and fail here, before
+                # DP/GQ are parsed. GT leads FORMAT per the VCF spec
+                if fmt[:3] == b"GT:" or fmt == b"GT":
+                    i = sample.find(b":")
+                    gt = sample[:i] if i >= 0 else sample
+                else:
+                    gt = extract_gt_dp_gq(fmt, sample)[0]
+
+                if gt not in _HET:
+                    if gt in _MISS:
+                        gt_missing += 1
+                    continue
+                after_gt += 1
+
+                _, dp, gq = extract_gt_dp_gq(fmt, sample)
+
+                # DP > 20, then GQ >= 30
+                if dp is None or dp_ok(dp) is None:
+                    continue
+                after_dp += 1
+
+                if gq is None or gq_ok(gq) is None:
+                    continue
+                after_gq += 1
+
+                keep.append(line)
+                if pq_writer is not None:
+                    rows.append((parts[0], parts[1], parts[3], parts[4], gt, dp, gq))
+                    if len(rows) >= PARQUET_BATCH:
+                        pq_writer.write_batch(_sidecar_batch(rows))
+                        rows.clear()
+
+            if fout is not None and keep:
+                keep.append(b"")  # trailing newline
+                fout.write(b"\n".join(keep))
+            if not data:
+                break
+
+        if pq_writer is not None and rows:
+            pq_writer.write_batch(_sidecar_batch(rows))
 
     return {
         "N_Records": n_records,
@@ -116,11 +367,38 @@ def filter_and_count(in_gz, out_gz):
     }
 
 
+def _run_one(job):
+    """
+    Filter + index one (in_gz, out_gz, threads, out_parquet, write_vcf) job;
+    runs in a worker process. Returns (job, counts or None, message or None).
+    """
+    in_gz, out_gz, threads, out_parquet, write_vcf = job
+    try:
+        counts = filter_and_count(in_gz, out_gz, threads, out_parquet, write_vcf)
+    except (OSError, EOFError, zlib.error) as e:  # EOFError: truncated gzip
+        return job, None, f"[ERROR] I/O failure for {in_gz.name}: {e}"
+    except ValueError as e:  # includes pyarrow.ArrowInvalid from the sidecar
+        return job, None, f"[ERROR] Failed for {in_gz.name}: {e}"
+    if not write_vcf:
+        return job, counts, None
+
+    # the index is a convenience for downstream readers; never fail the sample on it
+    if not is_bgzf(out_gz):
+        return job, counts, f"[WARN] {out_gz.name} is not BGZF (no bgzip/pysam), no .tbi index"
+    try:
+        if not tabix_index(out_gz):
+            return job, counts, f"[WARN] no pysam/tabix available, no .tbi index for {out_gz.name}"
+    except (OSError, subprocess.CalledProcessError) as e:
+        return job, counts, f"[WARN] tabix indexing failed for {out_gz.name}: {e}"
+    return job, counts, None
+
+
 def usage_and_exit():
     prog = Path(sys.argv[0]).name
     msg = (
         "Usage:\n"
-        f"  {prog} IN_GZ OUT_GZ\n\n"
+        f"  {prog} [--parquet] [--no-vcf] IN_GZ OUT_GZ [IN_GZ OUT_GZ ...]\n"
+        f"  {prog} [--parquet] [--no-vcf] --pairs PAIRS_TSV\n\n"
         "Example:\n"
         f"  {prog} ../input/Cohort_A/001.g.vcf.gz "
         "../output/filtered_gvcf/Cohort_A/001.het_dp20_gq30.vcf.gz\n"
@@ -130,34 +408,90 @@ def usage_and_exit():
 
 
 def main():
-    if len(sys.argv) != 3:
+    opts, args, pairs_file = set(), [], None
+    argv = iter(sys.argv[1:])
+    for a in argv:
+        if a == "--pairs":
+            pairs_file = next(argv, None)
+            if pairs_file is None:
+                usage_and_exit()
+        elif a.startswith("--"):
+            opts.add(a)
+        else:
+            args.append(a)
+
+    if pairs_file is not None:
+        try:
+            with open(pairs_file, encoding="utf-8") as fh:
+                for n, line in enumerate(fh, 1):
+                    if not line.strip():
+                        continue
+                    fields = line.rstrip("\r\n").split("\t")
+                    if len(fields) != 2:
+                        print(f"[ERROR] {pairs_file}:{n}: expected IN_GZ<TAB>OUT_GZ",
+                              file=sys.stderr)
+                        return 1
+                    args.extend(fields)
+        except OSError as e:
+            print(f"[ERROR] Cannot read pairs file: {e}", file=sys.stderr)
+            return 1
+
+    if (not args or len(args) % 2 or opts - {"--parquet", "--no-vcf"}
+            or ("--no-vcf" in opts and "--parquet" not in opts)):
         usage_and_exit()
+    with_parquet = "--parquet" in opts
+    write_vcf = "--no-vcf" not in opts
+    if with_parquet and pa is None:
+        print("[ERROR] --parquet requires pyarrow", file=sys.stderr)
+        return 4
+
+    rc = 0
+    pairs = []
+    for a, b in zip(args[::2], args[1::2]):
+        in_gz, out_gz = Path(a), Path(b)
+        if not in_gz.exists():
+            print(f"[ERROR] Input not found: {in_gz}", file=sys.stderr)
+            rc = 2
+            continue
+        pairs.append((in_gz, out_gz))
+    if not pairs:
+        return rc
+
+    # split the core budget between concurrent samples and their (de)compressors
+    workers = min(len(pairs), THREADS)
+    jobs = [(in_gz, out_gz, max(1, THREADS // workers),
+             sidecar_path(out_gz) if with_parquet else None, write_vcf)
+            for in_gz, out_gz in pairs]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_run_one, job): job for job in jobs}
+        for fut in as_completed(futures):
+            # one bad sample must not cost the [OK] lines of the others
+            try:
+                (in_gz, out_gz, _, out_parquet, _), counts, msg = fut.result()
+            except Exception as e:
+                print(f"[ERROR] Failed for {futures[fut][0].name}: {e!r}", file=sys.stderr)
+                rc = rc or 3
+                continue
+            if msg:
+                print(msg, file=sys.stderr)
+            if counts is None:
+                rc = rc or 3
+                continue
 
-    in_gz = Path(sys.argv[1])
-    out_gz = Path(sys.argv[2])
-
-    if not in_gz.exists():
-        print(f"[ERROR] Input not found: {in_gz}", file=sys.stderr)
-        return 2
-
-    try:
-        counts = filter_and_count(in_gz, out_gz)
-    except OSError as e:
-        print(f"[ERROR] I/O failure: {e}", file=sys.stderr)
-        return 3
-
-    # concise summary for logs
-    print(
-        "[OK] "
-        f"in={in_gz.name} out={out_gz.name} "
-        f"N_Records={counts['N_Records']} "
-        f"After_GT_Het={counts['After_GT_Het']} "
-        f"After_DP={counts['After_DP']} "
-        f"After_GQ={counts['After_GQ']} "
-        f"Het_Count={counts['Het_Count']}",
-        file=sys.stderr,
-    )
-    return 0
+            # concise summary for logs
+            out_name = out_gz.name if write_vcf else out_parquet.name
+            print(
+                "[OK] "
+                f"in={in_gz.name} out={out_name} "
+                f"N_Records={counts['N_Records']} "
+                f"After_GT_Het={counts['After_GT_Het']} "
+                f"After_DP={counts['After_DP']} "
+                f"After_GQ={counts['After_GQ']} "
+                f"Het_Count={counts['Het_Count']}",
+                file=sys.stderr,
+            )
+    return rc
 
 
 if __name__ == "__main__":
@@ -165,7 +499,7 @@ if __name__ == "__main__":
 
 """
 file=../input/Cohort_A/6iegzyVR.gvcf.gz
-outfile=../output/filtered_gvcf/Cohort_A/6iegzyVR.gvcf.gz
+outfile=../output/filtered_gvcf/Cohort_A/6iegzyVR.het_dp20_gq30.vcf.gz
 python3 filter_one_GZ.py $file $outfile
 """
 
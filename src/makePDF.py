@@ -25,6 +25,9 @@ Output:
 import sys
 from pathlib import Path
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
 
@@ -41,8 +44,13 @@ def read_parquets_from_dir(parquet_dir):
     if not files:
         raise FileNotFoundError("No .parquet files found in: %s" % parquet_dir)
 
-    dfs = [pd.read_parquet(fp) for fp in files]
-    return pd.concat(dfs, ignore_index=True, sort=False)
+    # one Arrow scan over all files (schemas unified like pd.concat would),
+    # materialized into pandas once, keeping Arrow-backed dtypes
+    schema = pa.unify_schemas([pq.read_schema(fp) for fp in files],
+                              promote_options="permissive")
+    table = ds.dataset([str(fp) for fp in files], schema=schema,
+                       format="parquet").to_table()
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
 
 
 def coerce_numeric(df, cols):
@@ -104,32 +112,35 @@ def add_summary_pages(pdf, df, input_dir):
     header.append("Number of Cohorts: %d" % n_cohorts)
     header.extend(["", "Numeric Summary by Cohort", "=" * 40, ""])
 
+    # all cohort x variable statistics in one groupby pass
+    num_cols = [c for c in NUM_COLS if c in df.columns]
+    if num_cols:
+        stats = (df[num_cols].apply(pd.to_numeric, errors="coerce")
+                 .groupby(cohort_str).describe(percentiles=[0.25, 0.5, 0.75])
+                 .astype("float64"))  # NA (e.g. std of n=1) -> NaN for %-formatting
+
     pages = []
     current = list(header)
     for cohort in cohorts:
-        subset = df[cohort_str == cohort]
         block = []
         block.append("Cohort: %s" % cohort)
         block.append("-" * 30)
 
-        for var in NUM_COLS:
-            if var not in subset.columns:
-                continue
-
-            s = pd.to_numeric(subset[var], errors="coerce").dropna()
-            if s.empty:
+        for var in num_cols:
+            s = stats.loc[cohort, var]
+            if s["count"] == 0:
                 continue
 
             block.extend([
                 "%s:" % var,
-                "  n     = %d" % len(s),
-                "  mean  = %.2f" % s.mean(),
-                "  std   = %.2f" % s.std(),
-                "  min   = %.2f" % s.min(),
-                "  25%%   = %.2f" % s.quantile(0.25),
-                "  50%%   = %.2f" % s.median(),
-                "  75%%   = %.2f" % s.quantile(0.75),
-                "  max   = %.2f" % s.max(),
+                "  n     = %d" % s["count"],
+                "  mean  = %.2f" % s["mean"],
+                "  std   = %.2f" % s["std"],
+                "  min   = %.2f" % s["min"],
+                "  25%%   = %.2f" % s["25%"],
+                "  50%%   = %.2f" % s["50%"],
+                "  75%%   = %.2f" % s["75%"],
+                "  max   = %.2f" % s["max"],
                 "",
             ])
 
@@ -158,9 +169,9 @@ def page_boxplot_by_cohort(pdf, df, ycol):
     if d.empty:
         return
 
-    cohort_str = d["Cohort"].astype(str)
-    cohorts = sorted(cohort_str.unique())
-    data = [d[cohort_str == c][ycol].values for c in cohorts]
+    groups = d[ycol].groupby(d["Cohort"].astype(str))  # sorted by cohort
+    cohorts = [c for c, _ in groups]
+    data = [g.values for _, g in groups]
 
     fig = plt.figure(figsize=(11.69, 8.27))
     ax = fig.add_subplot(111)
@@ -10,10 +10,10 @@ Output:
   ../output/all_cohorts_progressive_counts.tsv
   ../output/<Cohort>_progressive_counts.tsv
 """
+import csv
 import re
 import sys
 from pathlib import Path
-import pandas as pd
 
 OUTDIR = Path("../output")
 FILE_CHECK = OUTDIR / "file_check.tsv"
@@ -24,25 +24,38 @@ HEADER = [
     "N_Records","After_GT_Het","After_DP","After_GQ","Het_Count"
 ]
 
-KV = re.compile(r"(\w+)=([^\s]+)")
+# cells read as missing (pandas' default na_values) and written as "NA"
+NA_TOKENS = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None",
+    "n/a", "nan", "null",
+])
+
+LOG_COLS = ["Filtered_GZ_File", "N_Records", "After_GT_Het", "After_DP", "After_GQ", "Het_Count"]
+# full [OK] line as written by filter_one_GZ.py: all fields in one match
+OK_LINE = re.compile(
+    r"\bin=(\S+).*?\bout=(\S+).*?\bN_Records=(\S+).*?\bAfter_GT_Het=(\S+)"
+    r".*?\bAfter_DP=(\S+).*?\bAfter_GQ=(\S+).*?\bHet_Count=(\S+)")
 def parse_log(log_path):
-    rows = []
-    for line in log_path.read_text(encoding="utf-8", errors="replace").splitlines():
-        if not line.startswith("[OK]"):
-            continue
-        d = dict(KV.findall(line))
-        if "in" not in d:
-            continue
-        rows.append({
-            "GZ_File": d["in"],
-            "Filtered_GZ_File": d.get("out", "NA"),
-            "N_Records": d.get("N_Records", "NA"),
-            "After_GT_Het": d.get("After_GT_Het", "NA"),
-            "After_DP": d.get("After_DP", "NA"),
-            "After_GQ": d.get("After_GQ", "NA"),
-            "Het_Count": d.get("Het_Count", "NA"),
-        })
-    return pd.DataFrame(rows).drop_duplicates("GZ_File", keep="last")
+    """Map GZ_File -> counts from the [OK] lines of log_path; later lines win."""
+    rows = {}
+    with log_path.open(encoding="utf-8", errors="replace") as fh:
+        for line in fh:
+            if not line.startswith("[OK]"):
+                continue
+            m = OK_LINE.search(line)
+            if not m:
+                continue
+            gz, *vals = m.groups()
+            rows[gz] = dict(zip(LOG_COLS, vals))
+    return rows
+
+def write_tsv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        w = csv.DictWriter(fh, fieldnames=HEADER, delimiter="\t",
+                           lineterminator="\n")
+        w.writeheader()
+        w.writerows(rows)
 
 def main():
     if not FILE_CHECK.exists():
@@ -52,29 +65,26 @@ def main():
         print(f"[ERROR] Missing file: {LOGTXT}", file=sys.stderr)
         return 3
 
-    meta = pd.read_csv(FILE_CHECK, sep="\t", dtype=str).fillna("NA")
-    meta["GZ_File"] = meta["GZ_File"].map(lambda s: Path(str(s)).name)
-    logdf = parse_log(LOGTXT)
+    with FILE_CHECK.open(newline="") as fh:
+        meta = [{k: "NA" if v in NA_TOKENS else v for k, v in rec.items()}
+                for rec in csv.DictReader(fh, delimiter="\t")]
+    logs = parse_log(LOGTXT)
 
-    df = meta.merge(logdf, on="GZ_File", how="left", suffixes=("", "_log"))
-    if "Filtered_GZ_File_log" in df.columns:
-        df["Filtered_GZ_File"] = df["Filtered_GZ_File"].where(
-            df["Filtered_GZ_File"].notna() & (df["Filtered_GZ_File"] != "NA"),
-            df["Filtered_GZ_File_log"]
-        )
-        df = df.drop(columns=["Filtered_GZ_File_log"])
-
-    for c in ["N_Records","After_GT_Het","After_DP","After_GQ","Het_Count","Filtered_GZ_File"]:
-        if c not in df.columns:
-            df[c] = "NA"
-        df[c] = df[c].fillna("NA")
+    # left join on the gz file name; log values fill whatever file_check lacks
+    rows = []
+    for rec in meta:
+        rec["GZ_File"] = Path(rec["GZ_File"]).name
+        for k, v in logs.get(rec["GZ_File"], {}).items():
+            if rec.get(k, "NA") == "NA":
+                rec[k] = v
+        rows.append({c: rec.get(c, "NA") for c in HEADER})
 
-    df = df[HEADER]
     out_all = OUTDIR / "all_cohorts_progressive_counts.tsv"
-    df.to_csv(out_all, sep="\t", index=False)
+    write_tsv(out_all, rows)
 
-    for cohort, sub in df.groupby("Cohort"):
-        sub.to_csv(OUTDIR / f"{cohort}_progressive_counts.tsv", sep="\t", index=False)
+    for cohort in sorted({r["Cohort"] for r in rows}):
+        write_tsv(OUTDIR / f"{cohort}_progressive_counts.tsv",
+                  [r for r in rows if r["Cohort"] == cohort])
     print(f"[OK] Wrote merged and per-cohort progressive TSVs to: {OUTDIR}")
     return 0
 
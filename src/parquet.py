@@ -13,23 +13,45 @@ Output:
 """
 import sys
 from pathlib import Path
-import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as papq
 
 REQUIRED_COLUMNS = ["SampleID", "Age", "Ancestry", "IQ", "Cohort", "Het_Count"]
 
+# explicit types: no inference pass, and "NA" cells become nulls
+COLUMN_TYPES = {
+    "SampleID": pa.string(),
+    "Age": pa.int32(),
+    "Ancestry": pa.string(),
+    "IQ": pa.int32(),
+    "Cohort": pa.string(),
+    "Het_Count": pa.int64(),
+}
+
 def tsv_to_parquet_for_cohort(tsv_path, parquet_path):
     """
     Read a cohort *_progressive_counts.tsv, keep only REQUIRED_COLUMNS,
     and write Cohort_X.parquet
     """
-    df = pd.read_csv(tsv_path, sep="\t", dtype={"SampleID": str})
+    with open(tsv_path, encoding="utf-8") as fh:
+        header = fh.readline().rstrip("\r\n").split("\t")
 
-    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
     if missing:
         raise ValueError(f"{tsv_path.name}: missing required columns: {missing}")
 
+    table = pacsv.read_csv(
+        tsv_path,
+        parse_options=pacsv.ParseOptions(delimiter="\t"),
+        convert_options=pacsv.ConvertOptions(
+            column_types=COLUMN_TYPES,
+            include_columns=REQUIRED_COLUMNS,
+            strings_can_be_null=True,
+        ),
+    )
     parquet_path.parent.mkdir(parents=True, exist_ok=True)
-    df[REQUIRED_COLUMNS].to_parquet(parquet_path, index=False)
+    papq.write_table(table, parquet_path, compression="zstd")
 
 def main(tsv_root="../output/", parquet_root="../output/"):
     """
@@ -4,8 +4,8 @@
 #
 # Pipeline steps:
 #       1) verify.py: Generates gz_index.txt and file_check.tsv from cohort metadata
-#       2) filter.py: Filters each gVCF by GT, DP, and GQ;
-#					  Writes filtered gz files;
+#       2) filter_one_GZ.py: Filters each gVCF by GT, DP, and GQ (samples in parallel);
+#					  Writes filtered gz files (BGZF + .tbi index when bgzip/pysam is available);
 #					  Appends summary lines to log.txt
 #   	3) mergeMeta.py: Merges file_check.tsv and log.txt; Writes all_cohorts_progressive_counts.tsv
 #          and per-cohort progressive TSV files.
@@ -32,16 +32,24 @@ script=filter_one_GZ.py
 INDEX_FILE="../output/gz_index.txt" #generated by verify.py, one gz file path per line
 OUT_ROOT="../output/filtered_gvcf"
 LOG_FILE="../output/log.txt"
+PAIRS_FILE="../output/filter_pairs.tsv" # IN_GZ<TAB>OUT_GZ per line; filtered in parallel by one $script call
+: > "$PAIRS_FILE"
 while IFS= read -r infile; do # read INDEX_FILE per line
     [[ -z "$infile" ]] && continue
     cohort="$(basename "$(dirname "$infile")")"
     filename="$(basename "$infile")"
-    base="${filename%.gz}"
-    newname="${base}.het_dp20_gq30.gz"
+    base="${filename%.gz}"; base="${base%.vcf}"; base="${base%.gvcf}"; base="${base%.g}"
+    newname="${base}.het_dp20_gq30.vcf.gz" # BGZF + .tbi when bgzip/pysam is available
     outfile="$OUT_ROOT/$cohort/$newname"
     mkdir -p "$OUT_ROOT/$cohort"
-    python3 "$script" "$infile" "$outfile" &>> "$LOG_FILE"
+    printf '%s\t%s\n' "$infile" "$outfile" >> "$PAIRS_FILE"
 done < "$INDEX_FILE"
+n_pairs=$(wc -l < "$PAIRS_FILE")
+echo "[INFO] Running $script on $n_pairs files"
+if (( n_pairs )); then
+    python3 "$script" --pairs "$PAIRS_FILE" &>> "$LOG_FILE"
+fi
+echo "[OK] Finished $script"
 
 
 
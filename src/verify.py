@@ -15,17 +15,52 @@ Output:
 """
 import csv
 import gzip
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 import shutil
 
+try:
+    import rapidgzip
+except ImportError:  # optional: fall back to the stdlib reader
+    rapidgzip = None
 
-def line_count_of_gz(p: Path) -> int:
+THREADS = os.cpu_count() or 1
+CHUNK_SIZE = 1 << 22
+
+
+def line_count_of_gz(p: Path, threads: int = THREADS) -> int:
+    """Count lines by scanning decompressed chunks for newlines (no per-line iteration)."""
+    if rapidgzip is not None:
+        f = rapidgzip.open(str(p), parallelization=threads)
+    else:
+        f = gzip.open(p, "rb")
     n = 0
-    with gzip.open(p, "rb") as f:
-        for _ in f:
-            n += 1
-    return n
+    last = b"\n"
+    with f:
+        while buf := f.read(CHUNK_SIZE):
+            n += buf.count(b"\n")
+            last = buf[-1:]
+    return n + (last != b"\n")  # unterminated last line
+
+
+def gz_files_by_sample(cohort_dir: Path) -> dict:
+    """Map file name up to the first '.' -> .gz paths, one directory pass."""
+    by_sample = {}
+    with os.scandir(cohort_dir) as it:
+        for e in it:
+            if e.name.endswith(".gz"):
+                by_sample.setdefault(e.name.split(".")[0], []).append(e.path)
+    return by_sample
+
+
+def find_sample_gz(by_sample: dict, sid: str) -> list:
+    """.gz paths named '<sid>.*'; works for sample IDs that contain dots too."""
+    prefix = sid + "."
+    return [p for p in by_sample.get(sid.split(".")[0], [])
+            if os.path.basename(p).startswith(prefix)]
 
 
 def write_gz_index(file_check_path, gz_index_path):
@@ -47,31 +82,57 @@ def main(input_root="../input/", output_root="../output/"):
     out_root.mkdir(parents=True, exist_ok=True)
     out_file = out_root / "file_check.tsv"
     out_paths = out_root / "gz_paths.txt"
+    rows = []
+    for cohort in sorted(in_root.glob("Cohort_*")):
+        meta = cohort / "metadata.tsv"
+        if not meta.exists():
+            continue
+        gz_by_sample = gz_files_by_sample(cohort)
+        matched = set()
+        with meta.open() as fh:
+            r = csv.DictReader(fh, delimiter="\t")
+            for rec in r:
+                sid = rec["SampleID"]
+                hits = find_sample_gz(gz_by_sample, sid)
+                matched.update(hits)
+                note = "NORMAL" if len(hits) == 1 else (
+                    "MISSING" if len(hits) == 0 else "MULTIPLE_MATCH" )
+                gz = Path(hits[0]) if len(hits) == 1 else None
+                rows.append([
+                    sid,
+                    rec.get("Age", ""),
+                    rec.get("Ancestry", ""),
+                    rec.get("IQ", ""),
+                    cohort.name,
+                    gz, #"GZ_File" column
+                    "", #"Line_Count" column, filled below
+                    note ])
+        # files must be named '<SampleID>.*.gz'; flag the ones no sample claimed
+        for paths in gz_by_sample.values():
+            for p in sorted(set(paths) - matched):
+                print(f"[WARN] {p} matches no SampleID in {meta}", file=sys.stderr)
+
+    # count lines of all found files in parallel, one file per worker
+    gz_files = [row[5] for row in rows if row[5]]
+    if gz_files:
+        workers = min(len(gz_files), THREADS)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            counts = pool.map(line_count_of_gz, gz_files,
+                              repeat(max(1, THREADS // workers)))
+            line_counts = dict(zip(gz_files, counts))
+
     with out_file.open("w", newline="") as out_fh:
         w = csv.writer(out_fh, delimiter="\t")
         w.writerow( ["SampleID", "Age", "Ancestry", "IQ",
              "Cohort", "GZ_File", "Line_Count", "Note"] )
-        for cohort in sorted(in_root.glob("Cohort_*")):
-            meta = cohort / "metadata.tsv"
-            if not meta.exists():
-                continue
-            with meta.open() as fh:
-                r = csv.DictReader(fh, delimiter="\t")
-                for rec in r:
-                    sid = rec["SampleID"]
-                    hits = sorted(cohort.glob(f"{sid}*.gz"))
-                    note = "NORMAL" if len(hits) == 1 else (
-                        "MISSING" if len(hits) == 0 else "MULTIPLE_MATCH" )
-                    gz = hits[0] if len(hits) == 1 else None
-                    w.writerow([
-                        sid,
-                        rec.get("Age", ""),
-                        rec.get("Ancestry", ""),
-                        rec.get("IQ", ""),
-                        cohort.name,
-                        str(gz.resolve()) if gz else "", #"GZ_File" column
-                        line_count_of_gz(gz) if gz else "",
-                        note ])
+        for row in rows:
+            gz = row[5]
+            if gz:
+                row[5] = str(gz.resolve())
+                row[6] = line_counts[gz]
+            else:
+                row[5] = ""
+            w.writerow(row)
     gz_index = out_root / "gz_index.txt"
     write_gz_index(out_file, gz_index)
     print(f"[OK] Wrote line count stats to: {out_file}")